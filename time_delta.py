@@ -68,23 +68,34 @@ $ ./time_delta.py -1d
 2024-09-04 02:59:50-07:00 - 2024-09-05 02:59:50-07:00
 """
 
-import argparse
 import datetime
 import re
-import textwrap
 import sys
 
-DELTA_REGEX = re.compile(
-    r'''^
-        [-+]?
-        ((?P<days>\d+?)(d|day|days))?
-        ((?P<hours>\d+?)(h|hr|hour|hrs|hours))?
-        ((?P<minutes>\d+?)(m|min|mins|minutes))?
-        ((?P<seconds>\d+?)(s|sec|secs|seconds))?
-        $''',
-    flags=re.VERBOSE,
-)
-CLOCK_TIME_REGEX = re.compile(r'^[-+]?(?P<clock>(\d+:){0,3}\d+)$', flags=re.VERBOSE)
+_SEC_PER_MIN = 60
+_SEC_PER_HOUR = 3600
+_SEC_PER_DAY = 86400
+
+# Unit spellings accepted by the long format, mapped to their position in the
+# expected `days, hours, minutes, seconds` order and their length in seconds.
+_LONG_DELTA_UNITS = {
+    'd': (0, _SEC_PER_DAY), 'day': (0, _SEC_PER_DAY), 'days': (0, _SEC_PER_DAY),
+    'h': (1, _SEC_PER_HOUR), 'hr': (1, _SEC_PER_HOUR),
+    'hour': (1, _SEC_PER_HOUR), 'hrs': (1, _SEC_PER_HOUR),
+    'hours': (1, _SEC_PER_HOUR),
+    'm': (2, _SEC_PER_MIN), 'min': (2, _SEC_PER_MIN),
+    'mins': (2, _SEC_PER_MIN), 'minutes': (2, _SEC_PER_MIN),
+    's': (3, 1), 'sec': (3, 1), 'secs': (3, 1), 'seconds': (3, 1),
+}
+# Seconds per component of `[[[days:]hours:]minutes:]seconds`, by the number
+# of components present.
+_CLOCK_MULTIPLIERS = {
+    1: (1,),
+    2: (_SEC_PER_MIN, 1),
+    3: (_SEC_PER_HOUR, _SEC_PER_MIN, 1),
+    4: (_SEC_PER_DAY, _SEC_PER_HOUR, _SEC_PER_MIN, 1),
+}
+CLOCK_TIME_REGEX = re.compile(r'\A[-+]?(?:\d+:){0,3}\d+\Z')
 
 
 class TimeDeltaError(Exception):
@@ -93,48 +104,115 @@ class TimeDeltaError(Exception):
         self.message = message
 
 
+def _from_clock(time_str: str, start: int, sign: int) -> datetime.timedelta:
+    # `time_str` is expected to have matched CLOCK_TIME_REGEX already.
+    parts = tuple(map(int, time_str[start:].split(":")))
+    multipliers = _CLOCK_MULTIPLIERS.get(len(parts))
+    if multipliers is None:
+        raise TimeDeltaError(f"bad time '{time_str}'")
+    secs = sum(part * mult for part, mult in zip(parts, multipliers))
+    return datetime.timedelta(seconds=sign * secs)
+
+
+def _from_long_delta(time_str: str, start: int, sign: int) -> datetime.timedelta:
+    # Single pass over `time_str`: a run of digits followed by a run of
+    # letters naming the unit, units appearing at most once and in order.
+    i = start
+    end = len(time_str)
+    last_order = -1
+    secs = 0
+    while i < end:
+        tok_start = i
+        while i < end and time_str[i].isdecimal():
+            i += 1
+        if i == tok_start:
+            raise TimeDeltaError(f"bad time '{time_str}'")
+        value = int(time_str[tok_start:i])
+        tok_start = i
+        while i < end and time_str[i].isalpha():
+            i += 1
+        unit = _LONG_DELTA_UNITS.get(time_str[tok_start:i])
+        if unit is None or unit[0] <= last_order:
+            raise TimeDeltaError(f"bad time '{time_str}'")
+        last_order, unit_secs = unit
+        secs += unit_secs * value
+    return datetime.timedelta(seconds=sign * secs)
+
+
 def clock_format_to_delta(time_str: str) -> datetime.timedelta:
     time_str = time_str.strip()
-    match = CLOCK_TIME_REGEX.fullmatch(time_str)
-    if not match:
+    if not CLOCK_TIME_REGEX.fullmatch(time_str):
         raise TimeDeltaError(f"bad time '{time_str}'")
-    sign = -1 if time_str.startswith('-') else 1
-    parts = match.group('clock').split(":")
-    secs = 0
-    while parts:
-        match len(parts):
-            case 4:
-                # days
-                secs += 3600 * 24 * int(parts.pop(0))
-            case 3:
-                # hours
-                secs += 3600 * int(parts.pop(0))
-            case 2:
-                # minutes
-                secs += 60 * int(parts.pop(0))
-            case 1:
-                # seconds
-                secs += int(parts.pop(0))
-    return sign * datetime.timedelta(seconds=secs)
+    sign = -1 if time_str[:1] == '-' else 1
+    start = 1 if time_str[:1] in ('-', '+') else 0
+    return _from_clock(time_str, start, sign)
 
 
 def parse_long_delta(time_str: str) -> datetime.timedelta:
-    match = DELTA_REGEX.fullmatch(time_str)
-    if not match:
-        raise TimeDeltaError(f"bad time '{time_str}'")
-    sign = -1 if time_str.startswith('-') else 1
-    parts = match.groupdict()
-    time_params = {k: int(v) for k, v in parts.items() if v}
-    delta = datetime.timedelta(**time_params)
-    return sign * delta
+    sign = -1 if time_str[:1] == '-' else 1
+    start = 1 if time_str[:1] in ('-', '+') else 0
+    return _from_long_delta(time_str, start, sign)
 
 
 def parse_any_delta(time_str: str) -> datetime.timedelta:
-    if DELTA_REGEX.fullmatch(time_str):
-        return parse_long_delta(time_str)
-    if CLOCK_TIME_REGEX.fullmatch(time_str):
-        return clock_format_to_delta(time_str)
-    raise TimeDeltaError(f"bad time '{time_str}'")
+    # Pick the format up front so the input goes through a single parser:
+    # only the clock format has colons or no unit at all (a bare number).
+    sign = -1 if time_str[:1] == '-' else 1
+    start = 1 if time_str[:1] in ('-', '+') else 0
+    if ':' in time_str or time_str[start:].isdecimal():
+        if not CLOCK_TIME_REGEX.fullmatch(time_str):
+            raise TimeDeltaError(f"bad time '{time_str}'")
+        return _from_clock(time_str, start, sign)
+    return _from_long_delta(time_str, start, sign)
+
+
+def _format_timestamp(dt: datetime.datetime) -> str:
+    # Formats an aware `dt` like `dt.isoformat(sep=' ', timespec='seconds')`.
+    # `strftime` is only used for the common case: it doesn't zero-pad years
+    # before 1000 and `%z` renders offsets with seconds as `+HHMMSS`.
+    if dt.year < 1000 or dt.utcoffset().seconds % 60:
+        return dt.isoformat(sep=' ', timespec='seconds')
+    res = dt.strftime('%Y-%m-%d %H:%M:%S%z')
+    return f'{res[:-2]}:{res[-2:]}'
+
+
+def _parse_flags(argv: list[str]) -> tuple[bool, bool, int, list[str]]:
+    """Splits `argv` into (no_new_line, print_delta, help_level, args).
+
+    Behaves like `argparse.ArgumentParser.parse_known_args` with the `-n`,
+    `-v` and (counted) `-h` flags: flags can be grouped (`-nv`, `-hhh`),
+    anything else (e.g. `-1d`) is left in `args`, as is everything from
+    `--` onwards.
+    """
+    no_new_line, print_delta, help_level = False, False, 0
+    args = []
+    for pos, arg in enumerate(argv):
+        if arg == '--':
+            args.extend(argv[pos:])
+            break
+        if len(arg) < 2 or arg[0] != '-' or arg[1] not in 'nvh':
+            args.append(arg)
+            continue
+        for i, flag in enumerate(arg[1:], start=1):
+            if flag == 'n':
+                no_new_line = True
+            elif flag == 'v':
+                print_delta = True
+            elif flag == 'h':
+                help_level += 1
+            else:
+                explicit = arg[i:]
+                if i == 2:
+                    # Like argparse, `-n=x` reads as `-n` given the value `x`.
+                    explicit = explicit.removeprefix('=')
+                print(
+                    'usage: time_delta.py [-n] [-h] [-v]\n'
+                    f'time_delta.py: error: argument -{arg[i - 1]}: '
+                    f"ignored explicit argument '{explicit}'",
+                    file=sys.stderr,
+                )
+                exit(2)
+    return no_new_line, print_delta, help_level, args
 
 
 def main(args: list[str], print_end: str, print_delta: bool):
@@ -150,42 +228,45 @@ def main(args: list[str], print_end: str, print_delta: bool):
             delta_string, shift_string = args
 
         delta = parse_any_delta(delta_string)
-        now = datetime.datetime.now().astimezone()
-        shift = datetime.timedelta(seconds=0)
+        # Arithmetic is done in UTC; each end is localized only once, when
+        # displayed, so it gets the UTC offset in effect at that moment.
+        now = datetime.datetime.now(datetime.timezone.utc)
         if shift_string:
-            shift = parse_any_delta(shift_string)
-        now = now + shift
+            now = now + parse_any_delta(shift_string)
         then = now - delta
         if then > now:
             now, then = then, now
-        now_display = now.astimezone().isoformat(sep=' ', timespec='seconds')
-        then_display = then.astimezone().isoformat(sep=' ', timespec='seconds')
-        res = f'{then_display} - {now_display}'
+        now_display = _format_timestamp(now.astimezone())
+        then_display = _format_timestamp(then.astimezone())
+        parts = [then_display, ' - ', now_display]
         if print_delta:
-            res = f'{res}  # {delta_string}'
-        print(res, end=print_end)
+            parts += ['  # ', delta_string]
+        parts.append('\n' if print_end is None else print_end)
+        sys.stdout.write(''.join(parts))
     except TimeDeltaError as e:
         print(f'[{e.message}] args: {args}', file=sys.stderr, end=print_end)
         exit(1)
 
 
 if __name__ == '__main__':
-    parser = argparse.ArgumentParser('time_delta.py', add_help=False)
-    parser.add_argument('-n', dest='no_new_line', action='store_true')
-    parser.add_argument('-h', dest='help', action='count', default=0)
-    parser.add_argument('-v', dest='print_delta', action='store_true')
-
+    if len(sys.argv) == 1:
+        # Nothing to parse, fail right away.
+        main([], print_end=None, print_delta=False)
+    if len(sys.argv) == 2 and sys.argv[1][:1] != '-':
+        # The common `./time_delta.py 1h`: a lone delta, no flags to parse.
+        main(sys.argv[1:], print_end=None, print_delta=False)
+        exit(0)
 
-    known_args, args = parser.parse_known_args()
+    no_new_line, print_delta, help_level, args = _parse_flags(sys.argv[1:])
 
-    if known_args.help:
-        if known_args.help >= 1:
-            print(textwrap.dedent(__doc__), file=sys.stderr)
-        if known_args.help >= 2:
-            print(textwrap.dedent(_ARGS), file=sys.stderr)
-        if known_args.help >= 3:
-            print(textwrap.dedent(_EXAMPLES), file=sys.stderr)
+    if help_level:
+        if help_level >= 1:
+            print(__doc__, file=sys.stderr)
+        if help_level >= 2:
+            print(_ARGS, file=sys.stderr)
+        if help_level >= 3:
+            print(_EXAMPLES, file=sys.stderr)
         exit(0)
 
-    print_end='' if known_args.no_new_line else None
-    main(args, print_end=print_end, print_delta=known_args.print_delta)
+    print_end='' if no_new_line else None
+    main(args, print_end=print_end, print_delta=print_delta)